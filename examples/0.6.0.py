@@ -6,12 +6,14 @@ F-strings now render as markdown, just like regular string literals.
 
 version = "0.6.0"
 
+NEWLINE = "\n"  # Backslashes are not allowed inside f-string expressions before 3.12
+
 items = ["F-string markdown", "Image sizing"]
 
 f"""
 ### New in {version}
 
-{chr(10).join(f'- {item}' for item in items)}
+{NEWLINE.join([f'- {item}' for item in items])}
 """
 
 """
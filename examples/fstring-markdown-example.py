@@ -9,12 +9,14 @@ version = "0.6.0"
 
 f"## Welcome to **{name}** v{version}"
 
+NEWLINE = "\n"  # Backslashes are not allowed inside f-string expressions before 3.12
+
 items = ["Fast execution", "Live output", "Markdown support"]
 
 f"""
 ### Features
 
-{chr(10).join(f'- {item}' for item in items)}
+{NEWLINE.join([f'- {item}' for item in items])}
 """
 
 result = 2 + 2
@@ -2,10 +2,23 @@
 pdit - Interactive Python code editor with inline execution results.
 """
 
-from .ipython_executor import IPythonExecutor
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .ipython_executor import IPythonExecutor
 
 __version__ = "0.1.0"
 
 __all__ = [
     "IPythonExecutor",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # Import the executor on first access: it pulls in jupyter_client, which
+    # the CLI doesn't need for --help or before the server starts.
+    if name == "IPythonExecutor":
+        from .ipython_executor import IPythonExecutor
+
+        return IPythonExecutor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
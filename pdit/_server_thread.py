@@ -0,0 +1,82 @@
+"""
+Uvicorn server that runs in a background thread.
+
+Kept out of pdit.cli so that `pdit --help` doesn't import uvicorn.
+"""
+
+import contextlib
+import os
+import socket
+import threading
+from typing import Iterator, List, Optional
+
+import uvicorn
+
+
+class Server(uvicorn.Server):
+    """Custom Server class that can run in a background thread."""
+
+    def __init__(self, config: uvicorn.Config, shutdown_event: threading.Event) -> None:
+        """Initialize the server.
+
+        Args:
+            config: Uvicorn configuration
+            shutdown_event: Event set when a shutdown has been requested
+        """
+        super().__init__(config)
+        self._shutdown_event = shutdown_event
+        # Set once startup has finished (successfully or not)
+        self._ready = threading.Event()
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        """Run uvicorn startup, then wake up the thread waiting in run_in_thread."""
+        try:
+            await super().startup(sockets=sockets)
+        finally:
+            self._ready.set()
+
+    def install_signal_handlers(self) -> None:
+        """Disable signal handlers for threading compatibility."""
+        pass
+
+    @contextlib.contextmanager
+    def run_in_thread(self, sockets: Optional[List[socket.socket]] = None) -> Iterator[None]:
+        """Run server in background thread, wait for startup.
+
+        Args:
+            sockets: Optional pre-bound sockets for uvicorn to serve on
+
+        Raises:
+            RuntimeError: If the server thread exits before startup completes
+        """
+        thread = threading.Thread(target=self.run, kwargs={"sockets": sockets}, daemon=True)
+        thread.start()
+        try:
+            # Wait for server to be ready. startup() sets _ready, but if the
+            # thread dies before reaching it (e.g. the app fails to import),
+            # notice that instead of waiting for a signal that never comes.
+            # A shutdown signal also ends the wait, so a hanging startup
+            # can still be interrupted.
+            while not self._ready.wait(timeout=0.1):
+                if not thread.is_alive() or self._shutdown_event.is_set():
+                    break
+            if not self.started and not self._shutdown_event.is_set():
+                raise RuntimeError("Server failed to start")
+            yield
+        finally:
+            # Signal WebSocket connections to close before shutting down server.
+            # This shuts sessions down synchronously, so no grace sleep is needed.
+            # pdit.server reads PDIT_PORT at import time, so it is only
+            # imported here, after start() has picked the port.
+            from .server import signal_shutdown
+            signal_shutdown()
+
+            # Clean shutdown, escalating to uvicorn's force exit, then to
+            # killing the process if the server thread still hangs
+            self.should_exit = True
+            thread.join(timeout=0.5)
+            if thread.is_alive():
+                self.force_exit = True
+                thread.join(timeout=1.0)
+            if thread.is_alive():
+                os._exit(1)
@@ -4,66 +4,108 @@ Command-line interface for pdit.
 Provides the `pdit` command to start the server and open the web interface.
 """
 
-import contextlib
+import errno
+import functools
+import getpass
+import os
 import signal
 import socket
+import stat
 import sys
-import time
+import tempfile
 import threading
-import webbrowser
-import secrets
-import urllib.parse
 from pathlib import Path
+from socket import SO_REUSEADDR, SOCK_STREAM, SOL_SOCKET
+from types import FrameType
 from typing import Optional
 
 import typer
-import uvicorn
-from rich import box
-from rich.console import Console
-from rich.panel import Panel
 from typing_extensions import Annotated
 
+# uvicorn, rich and the exporter are imported where they are used, so that
+# `pdit --help` and `pdit --export` don't pay for the server stack.
 
-# Flag for graceful shutdown on SIGTERM
-_shutdown_requested = False
+
+# Port the server prefers when none is given on the command line
+DEFAULT_PORT = 8888
+
+# bind() errors that mean "try another port" rather than a real failure
+_PORT_UNAVAILABLE_ERRNOS = frozenset({errno.EADDRINUSE, errno.EACCES})
+
+# Package directory, and the built frontend assets shipped inside it
+_PKG_DIR = Path(__file__).resolve().parent
+_STATIC_DIR = _PKG_DIR / "_static"
+_INDEX_HTML = _STATIC_DIR / "index.html"
+
+# Set on SIGTERM to request a graceful shutdown
+_shutdown_event = threading.Event()
 
 app = typer.Typer(add_completion=False)
-_console = Console()
 
 
-def find_available_port(start_port=8888, max_tries=100):
-    """Find an available port starting from start_port.
+def bind_port(
+    host: str = "127.0.0.1",
+    start_port: int = DEFAULT_PORT,
+    strict: bool = False,
+) -> socket.socket:
+    """Bind a socket to start_port, or to an OS-assigned port if it is taken.
 
     Args:
-        start_port: Port to start searching from
-        max_tries: Maximum number of ports to try
+        host: Host address to bind to
+        start_port: Preferred port
+        strict: Only try start_port, never fall back to another port
 
     Returns:
-        Available port number
+        Bound socket; the caller owns it and must close it or hand it on
 
     Raises:
-        RuntimeError: If no available port found within max_tries
+        RuntimeError: If strict and start_port is unavailable
+        OSError: If bind fails for a reason other than the port being unavailable
     """
-    for port in range(start_port, start_port + max_tries):
+    # Resolve the host first so IPv6 addresses (e.g. ::1) get an IPv6 socket
+    family, _, _, _, address = socket.getaddrinfo(
+        host, start_port, type=SOCK_STREAM, flags=socket.AI_PASSIVE
+    )[0]
+    s = socket.socket(family, SOCK_STREAM)
+    try:
+        # Allow reuse of ports in TIME_WAIT state
+        s.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                # Allow reuse of ports in TIME_WAIT state
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                s.bind(("127.0.0.1", port))
-                return port
-        except OSError:
-            continue
-    raise RuntimeError(f"Could not find available port in range {start_port}-{start_port + max_tries}")
-
-
+            s.bind(address)
+            return s
+        except OSError as e:
+            # Only "taken" and "not allowed" mean fall back to another port;
+            # anything else (e.g. a bad host) is a real error
+            if e.errno not in _PORT_UNAVAILABLE_ERRNOS:
+                raise
+            if strict:
+                if e.errno == errno.EACCES:
+                    raise RuntimeError(f"Permission denied binding port {start_port}") from e
+                raise RuntimeError(f"Port {start_port} is already in use") from e
+        # A failed bind leaves the socket unbound, so let the kernel pick a port
+        s.bind((address[0], 0) + address[2:])
+        return s
+    except BaseException:
+        s.close()
+        raise
+
+
+@functools.lru_cache(maxsize=1)
 def resolve_demo_script_path() -> Path:
     """Resolve the bundled demo script path."""
-    package_demo_path = Path(__file__).resolve().parent / "_demo.py"
+    package_demo_path = _PKG_DIR / "_demo.py"
     if not package_demo_path.exists():
         raise FileNotFoundError("Demo script not found")
     return package_demo_path
 
 
+@functools.lru_cache(maxsize=1)
+def _static_dir_ready() -> bool:
+    """Check whether the frontend build is present."""
+    # index.html can only exist inside an existing _static dir, so one stat suffices
+    return _INDEX_HTML.exists()
+
+
 def ensure_script_exists(script: Path) -> None:
     """Create a script file if it does not exist."""
     if script.exists():
@@ -83,38 +125,71 @@ def ensure_script_exists(script: Path) -> None:
         raise typer.Exit(1)
 
 
-class Server(uvicorn.Server):
-    """Custom Server class that can run in a background thread."""
+def _token_cache_path() -> Path:
+    """Return the per-user file the API token is persisted in."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return Path(runtime_dir) / f"pdit-token-{user}"
 
-    def install_signal_handlers(self):
-        """Disable signal handlers for threading compatibility."""
-        pass
 
-    @contextlib.contextmanager
-    def run_in_thread(self):
-        """Run server in background thread, wait for startup."""
-        thread = threading.Thread(target=self.run, daemon=True)
-        thread.start()
-        try:
-            # Wait for server to be ready
-            while not self.started:
-                time.sleep(1e-3)
-            yield
-        finally:
-            # Signal WebSocket connections to close before shutting down server
-            from .server import signal_shutdown
-            signal_shutdown()
-
-            # Give connections a moment to close
-            time.sleep(0.2)
-
-            # Clean shutdown
-            self.should_exit = True
-            thread.join(timeout=3.0)
-            if thread.is_alive():
-                # Force exit if shutdown takes too long
-                import sys
-                sys.exit(1)
+def _read_cached_token(path: Path) -> Optional[str]:
+    """Read a persisted token, ignoring files another user could have planted."""
+    try:
+        st = path.lstat()
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    if hasattr(os, "getuid") and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+        return None
+    try:
+        return path.read_text().strip() or None
+    except OSError:
+        return None
+
+
+def _write_cached_token(path: Path, token: str) -> None:
+    """Persist a token readable only by the current user (best effort)."""
+    try:
+        path.unlink(missing_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(token)
+    except OSError:
+        # e.g. disk full; don't leave a truncated token behind
+        path.unlink(missing_ok=True)
+
+
+def resolve_auth_token(no_token_auth: bool, rotate: bool = False) -> Optional[str]:
+    """Return the API token, reusing the previous one where possible.
+
+    PDIT_TOKEN takes precedence. Otherwise the token persisted by the last run
+    is reused, so restarting pdit keeps open browser tabs authorized. The
+    token is stored in PDIT_TOKEN, which passes it to the server.
+
+    Args:
+        no_token_auth: Disable token authentication entirely
+        rotate: Ignore the persisted token and generate a new one
+    """
+    if no_token_auth:
+        os.environ.pop("PDIT_TOKEN", None)
+        return None
+    token = os.environ.get("PDIT_TOKEN")
+    if token:
+        return token
+
+    cache_path = _token_cache_path()
+    token = None if rotate else _read_cached_token(cache_path)
+    if not token:
+        import secrets
+
+        token = secrets.token_urlsafe(24)
+        _write_cached_token(cache_path, token)
+    os.environ["PDIT_TOKEN"] = token
+    return token
 
 
 def start(
@@ -123,53 +198,47 @@ def start(
     host: str = "127.0.0.1",
     no_browser: bool = False,
     no_token_auth: bool = False,
+    rotate_token: bool = False,
 ):
     """Start the pdit server with optional script."""
 
     # Check if frontend is built
-    static_dir = Path(__file__).parent / "_static"
-    if not static_dir.exists() or not (static_dir / "index.html").exists():
-        typer.echo("Warning: Frontend build not found at pdit/_static/", err=True)
-        typer.echo("The server will start but the web interface won't be available.", err=True)
-        typer.echo("Run './scripts/build-frontend.sh' to build and copy the frontend.", err=True)
-        typer.echo()
+    if not _static_dir_ready():
+        sys.stderr.write(
+            "Warning: Frontend build not found at pdit/_static/\n"
+            "The server will start but the web interface won't be available.\n"
+            "Run './scripts/build-frontend.sh' to build and copy the frontend.\n"
+        )
+        print()
 
     # Use script path as-is (relative to current directory)
     script_path = None
     if script:
         script_path = str(script)
 
-    # Determine port to use
-    if port is None:
-        # No port specified: find available port starting from 8888
-        actual_port = find_available_port(start_port=8888)
-        if actual_port != 8888:
-            typer.echo(f"Port 8888 is already in use, using port {actual_port} instead")
-    else:
-        # Port explicitly specified: use it or fail
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                # Allow reuse of ports in TIME_WAIT state
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                s.bind((host, port))
-                actual_port = port
-        except OSError:
-            typer.echo(f"Error: Port {port} is already in use", err=True)
-            sys.exit(1)
-
-    # Pass port/token to server via environment variables for CORS and auth
-    import os
+    # Bind the port here and hand the socket to uvicorn, so the port cannot be
+    # taken between checking it and serving on it. An explicit port must be
+    # used as-is; otherwise fall back to any free port.
+    try:
+        sock = bind_port(
+            host,
+            DEFAULT_PORT if port is None else port,
+            strict=port is not None,
+        )
+    except (RuntimeError, OSError) as e:
+        typer.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    actual_port = sock.getsockname()[1]
+    if port is None and actual_port != DEFAULT_PORT:
+        print(f"Port {DEFAULT_PORT} is already in use, using port {actual_port} instead")
+
+    # Pass port/token to server via environment variables for CORS and auth.
+    # The token is only generated once the port has been secured.
     os.environ["PDIT_PORT"] = str(actual_port)
-    token = None
-    if no_token_auth:
-        os.environ.pop("PDIT_TOKEN", None)
-    else:
-        token = os.environ.get("PDIT_TOKEN")
-        if not token:
-            token = secrets.token_urlsafe(24)
-            os.environ["PDIT_TOKEN"] = token
+    token = resolve_auth_token(no_token_auth, rotate=rotate_token)
 
-    # Build URL with token and optional script
+    # Build URL with token and optional script. The URL is built even with
+    # --no-browser, since the panel below is how headless users find it.
     url = f"http://{host}:{actual_port}"
     params = {}
     if script_path:
@@ -177,9 +246,18 @@ def start(
     if token:
         params["token"] = token
     if params:
+        import urllib.parse
+
         url = f"{url}?{urllib.parse.urlencode(params)}"
 
-    typer.echo(f"Starting pdit server on {host}:{actual_port}")
+    print(f"Starting pdit server on {host}:{actual_port}")
+
+    import uvicorn
+    from rich import box
+    from rich.console import Console
+    from rich.panel import Panel
+
+    from ._server_thread import Server
 
     # Configure and create server
     config = uvicorn.Config(
@@ -188,35 +266,55 @@ def start(
         port=actual_port,
         log_level="info"
     )
-    server = Server(config=config)
-
-    # Run server in thread, open browser when ready
-    with server.run_in_thread():
-        # Server is guaranteed to be ready here
-        panel = Panel.fit(
-            f"[bold]Open in browser[/bold]\n{url}",
-            box=box.ROUNDED,
-            padding=(1, 2),
-        )
-        _console.print(panel)
-        if not no_browser:
-            webbrowser.open(url)
-            typer.echo("Opening browser...")
+    server = Server(config=config, shutdown_event=_shutdown_event)
 
-        # Set up SIGTERM handler for graceful shutdown
-        def handle_sigterm(signum, frame):
-            global _shutdown_requested
-            _shutdown_requested = True
+    # Install shutdown handlers before anything slow happens, so SIGTERM and
+    # Ctrl+C are honoured during startup and while the browser launches
+    _shutdown_event.clear()
 
-        signal.signal(signal.SIGTERM, handle_sigterm)
+    def handle_shutdown_signal(signum: int, frame: Optional[FrameType]) -> None:
+        # Only the first signal shuts down gracefully; a second Ctrl+C during
+        # a slow shutdown raises KeyboardInterrupt as usual
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        _shutdown_event.set()
 
-        # Keep server running
-        try:
-            while not _shutdown_requested:
-                time.sleep(0.1)  # Check more frequently for shutdown
-            typer.echo("\nShutting down...")
-        except KeyboardInterrupt:
-            typer.echo("\nShutting down...")
+    previous_sigterm = signal.signal(signal.SIGTERM, handle_shutdown_signal)
+    previous_sigint = signal.signal(signal.SIGINT, handle_shutdown_signal)
+
+    try:
+        # Run server in thread, open browser when ready
+        with server.run_in_thread(sockets=[sock]):
+            # Server is ready here, unless a signal cut startup short
+            if not _shutdown_event.is_set():
+                panel = Panel.fit(
+                    f"[bold]Open in browser[/bold]\n{url}",
+                    box=box.ROUNDED,
+                    padding=(1, 2),
+                )
+                Console().print(panel)
+                if not no_browser:
+                    # Launching the browser can block on some platforms, so do it off the main thread
+                    import webbrowser
+
+                    threading.Thread(target=webbrowser.open_new_tab, args=(url,), daemon=True).start()
+                    print("Opening browser...")
+
+            # Keep server running until SIGTERM or Ctrl+C. The wait is timed
+            # because an untimed lock wait on the main thread cannot be
+            # interrupted by Ctrl+C on Windows.
+            try:
+                while not _shutdown_event.wait(timeout=1.0):
+                    pass
+            except KeyboardInterrupt:
+                pass
+            print("\nShutting down...")
+    except RuntimeError as e:
+        # The server thread died during startup
+        typer.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    finally:
+        signal.signal(signal.SIGTERM, previous_sigterm)
+        signal.signal(signal.SIGINT, previous_sigint)
 
 
 @app.command()
@@ -243,7 +341,7 @@ def main_command(
     ] = False,
     port: Annotated[
         Optional[int],
-        typer.Option(help="Port to run server on (default: 8888, or next available)")
+        typer.Option(help="Port to run server on (default: 8888, or an OS-assigned free port if taken)")
     ] = None,
     host: Annotated[
         str,
@@ -257,6 +355,10 @@ def main_command(
         bool,
         typer.Option("--no-token-auth", help="Disable token authentication for API access")
     ] = False,
+    rotate_token: Annotated[
+        bool,
+        typer.Option("--rotate-token", help="Generate a new token instead of reusing the last one")
+    ] = False,
 ):
     """Start the pdit server, or export a script to HTML with --export."""
     if demo:
@@ -273,31 +375,37 @@ def main_command(
         if not script:
             typer.echo("Error: script is required for --export", err=True)
             raise typer.Exit(1)
-        if not script.exists():
+        # One stat() answers both "exists" and "is a directory"
+        try:
+            script_mode = script.stat().st_mode
+        except OSError:
             typer.echo(f"Error: script not found: {script}", err=True)
             raise typer.Exit(1)
-        if script.is_dir():
+        if stat.S_ISDIR(script_mode):
             typer.echo(f"Error: {script} is a directory", err=True)
             raise typer.Exit(1)
 
         from .exporter import export_script
 
         try:
-            html_output = export_script(script)
+            html_bytes = export_script(script)
         except FileNotFoundError as e:
             typer.echo(f"Error: {e}", err=True)
             raise typer.Exit(1)
 
+        # The export is already UTF-8; hand it to a single binary write
         if stdout:
-            typer.echo(html_output)
+            sys.stdout.buffer.write(html_bytes)
+            sys.stdout.buffer.write(b"\n")
+            sys.stdout.buffer.flush()
         else:
-            output_path = output if output else script.with_suffix('.html')
-            output_path.write_text(html_output)
+            output_path = output or script.with_suffix(".html")
+            output_path.write_bytes(html_bytes)
             typer.echo(f"Exported to {output_path}")
     else:
         if script:
             ensure_script_exists(script)
-        start(script, port, host, no_browser, no_token_auth)
+        start(script, port, host, no_browser, no_token_auth, rotate_token)
 
 
 def main():
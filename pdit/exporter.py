@@ -1,11 +1,32 @@
 """Export functionality for pdit scripts."""
 
+import asyncio
+import functools
 import json
 from pathlib import Path
 from typing import Any
 
 from .ipython_executor import IPythonExecutor
 
+try:
+    import orjson
+except ImportError:  # Optional (pdit[fast]): only used to speed up large exports
+    orjson = None  # type: ignore[assignment]
+
+_EXPORT_HTML = Path(__file__).resolve().parent / "_static" / "export.html"
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize obj to UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # e.g. integers wider than 64 bits; the stdlib handles those
+            pass
+    # ASCII output, so lone surrogates cannot break the encode
+    return json.dumps(obj).encode("ascii")
+
 
 def execute_script(script_content: str, script_name: str) -> list[dict[str, Any]]:
     """Execute a script and return expressions in frontend format.
@@ -17,74 +38,113 @@ def execute_script(script_content: str, script_name: str) -> list[dict[str, Any]
     Returns:
         List of expression dicts ready for frontend consumption
     """
+    return asyncio.run(_collect_expressions(script_content, script_name))
+
+
+async def _collect_expressions(script_content: str, script_name: str) -> list[dict[str, Any]]:
+    """Run the script in a fresh kernel and gather its results."""
     executor = IPythonExecutor()
-    expressions = []
-    expression_id = 0
+    expressions: list[dict[str, Any]] = []
+    append = expressions.append
 
     try:
-        for event in executor.execute_script(script_content, script_name=script_name):
-            # Skip the expressions list event
-            if event.get("type") == "expressions":
+        async for event in executor.execute_script(script_content, script_name=script_name):
+            # Result events have an output field; skip the expressions list event
+            output = event.get("output")
+            if output is None:
                 continue
-            # Result events have output field
-            if "output" in event:
-                expressions.append({
-                    "id": expression_id,
-                    "lineStart": event["lineStart"],
-                    "lineEnd": event["lineEnd"],
-                    "state": "done",
-                    "result": {
-                        "output": event["output"],
-                        "isInvisible": event["isInvisible"]
-                    }
-                })
-                expression_id += 1
+            append({
+                "id": len(expressions),
+                "lineStart": event["lineStart"],
+                "lineEnd": event["lineEnd"],
+                "state": "done",
+                "result": {
+                    "output": output,
+                    "isInvisible": event["isInvisible"]
+                }
+            })
     finally:
-        executor.shutdown()
+        await executor.shutdown()
 
     return expressions
 
 
-def generate_html(script_content: str, expressions: list[dict[str, Any]]) -> str:
-    """Generate self-contained HTML from script and execution results.
+@functools.lru_cache(maxsize=1)
+def _template_parts() -> tuple[bytes, bytes]:
+    """Read export.html once and split it where the payload is injected.
+
+    Returns:
+        The encoded template up to, and from, its closing </head> tag
+
+    Raises:
+        FileNotFoundError: If export.html template is missing
+    """
+    try:
+        template = _EXPORT_HTML.read_bytes()
+    except FileNotFoundError:
+        raise FileNotFoundError("export.html not found. Run './scripts/build-frontend.sh' first.") from None
+
+    head_end = template.find(b"</head>")
+    if head_end == -1:
+        return template, b""
+    return template[:head_end], template[head_end:]
+
+
+def render_html(script_content: str, expressions: list[dict[str, Any]]) -> bytes:
+    """Generate self-contained HTML as UTF-8 bytes, ready to write out.
 
     Args:
         script_content: The original Python source code
         expressions: List of expression results from execute_script()
 
     Returns:
-        Complete HTML string ready to write to file
+        Complete HTML document, encoded as UTF-8
 
     Raises:
         FileNotFoundError: If export.html template is missing
     """
-    static_dir = Path(__file__).parent / "_static"
-    export_html_path = static_dir / "export.html"
-
-    if not export_html_path.exists():
-        raise FileNotFoundError("export.html not found. Run './scripts/build-frontend.sh' first.")
-
-    template = export_html_path.read_text()
+    head, tail = _template_parts()
 
     response_data = {
         "code": script_content,
         "expressions": expressions
     }
-    json_data = json.dumps(response_data).replace("<", "\\u003c")
-    injection_script = f'<script>window.__pdit_response__ = {json_data};</script>'
+    json_data = _dumps(response_data).replace(b"<", b"\\u003c")
+
+    return b"".join((
+        head,
+        b"<script>window.__pdit_response__ = ",
+        json_data,
+        b";</script>\n",
+        tail,
+    ))
+
+
+def generate_html(script_content: str, expressions: list[dict[str, Any]]) -> str:
+    """Generate self-contained HTML from script and execution results.
+
+    Args:
+        script_content: The original Python source code
+        expressions: List of expression results from execute_script()
 
-    return template.replace('</head>', f'{injection_script}\n</head>')
+    Returns:
+        Complete HTML string ready to write to file
+
+    Raises:
+        FileNotFoundError: If export.html template is missing
+    """
+    return render_html(script_content, expressions).decode("utf-8")
 
 
-def export_script(script_path: Path) -> str:
+def export_script(script_path: Path) -> bytes:
     """Execute a script and generate HTML export.
 
     Args:
         script_path: Path to the Python script
 
     Returns:
-        Complete HTML string
+        Complete HTML document, encoded as UTF-8
     """
     script_content = script_path.read_text()
     expressions = execute_script(script_content, script_path.name)
-    return generate_html(script_content, expressions)
+    return render_html(script_content, expressions)
@@ -5,14 +5,20 @@ Provides a FileWatcher class that monitors a single file for changes
 and streams events through an async queue.
 """
 
+import os
 import threading
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import AsyncGenerator, Optional, Union
-from watchfiles import awatch
+from watchfiles import Change, awatch
 import time
 
 
+def _now() -> int:
+    """Current time in whole seconds since the epoch, for event timestamps."""
+    return time.time_ns() // 1_000_000_000
+
+
 @dataclass
 class FileEvent:
     """Base class for file watcher events."""
@@ -74,6 +80,8 @@ class FileWatcher:
         """
         self.file_path = Path(file_path).resolve()
         self.stop_event = stop_event
+        # Compared against raw event paths to skip other files cheaply
+        self._target = str(self.file_path)
 
     async def watch_with_initial(
         self
@@ -96,27 +104,27 @@ class FileWatcher:
         # Validate file exists
         if not self.file_path.exists():
             yield FileErrorEvent(
-                path=str(self.file_path),
+                path=self._target,
                 message=f"File not found: {self.file_path}",
-                timestamp=int(time.time())
+                timestamp=_now()
             )
             return
 
         # Read and yield initial content
+        timestamp = _now()
         try:
             content = self.file_path.read_text()
-            timestamp = int(time.time())
 
             yield InitialFileEvent(
-                path=str(self.file_path),
+                path=self._target,
                 content=content,
                 timestamp=timestamp
             )
         except Exception as e:
             yield FileErrorEvent(
-                path=str(self.file_path),
+                path=self._target,
                 message=f"Error reading file: {str(e)}",
-                timestamp=int(time.time())
+                timestamp=timestamp
             )
             return
 
@@ -127,36 +135,38 @@ class FileWatcher:
         # This ensures quick response to server shutdown
         async for changes in awatch(watch_path, stop_event=self.stop_event, rust_timeout=100):
             for change_type, changed_path in changes:
-                changed_path = Path(changed_path).resolve()
-
-                # Skip events for other files
-                if changed_path != self.file_path:
+                # Skip events for other files. awatch reports paths under the
+                # resolved parent, so only resolve paths with a matching name
+                # that do not already compare equal
+                if changed_path != self._target and (
+                    os.path.basename(changed_path) != self.file_path.name
+                    or Path(changed_path).resolve() != self.file_path
+                ):
                     continue
 
-                from watchfiles import Change
+                timestamp = _now()
 
                 # Handle file deletion
                 if change_type == Change.deleted:
                     yield FileDeletedEvent(
-                        path=str(self.file_path),
-                        timestamp=int(time.time())
+                        path=self._target,
+                        timestamp=timestamp
                     )
                     return
 
                 # Handle file modification (Change.added or Change.modified)
                 try:
                     content = self.file_path.read_text()
-                    timestamp = int(time.time())
 
                     yield FileChangedEvent(
-                        path=str(self.file_path),
+                        path=self._target,
                         content=content,
                         timestamp=timestamp
                     )
                 except Exception as e:
                     yield FileErrorEvent(
-                        path=str(self.file_path),
+                        path=self._target,
                         message=f"Error reading file: {str(e)}",
-                        timestamp=int(time.time())
+                        timestamp=timestamp
                     )
                     return
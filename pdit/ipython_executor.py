@@ -7,11 +7,14 @@ Yields event dicts directly for minimal server overhead.
 
 import ast
 import asyncio
-import io
+import functools
+import hashlib
 import json
 import logging
+import queue
 import re
 import traceback
+from collections import OrderedDict
 from typing import Any, AsyncGenerator, Awaitable, Callable, Optional
 
 from jupyter_client import AsyncKernelManager
@@ -19,6 +22,59 @@ from jupyter_client import AsyncKernelManager
 
 logger = logging.getLogger(__name__)
 
+# Number of parsed scripts remembered per executor
+PARSE_CACHE_SIZE = 32
+
+# Events buffered between statement execution and the execute_script consumer;
+# a slow consumer pauses execution once this many are pending
+PIPELINE_DEPTH = 2
+
+# Minimum seconds between on_stream updates for one statement
+STREAM_UPDATE_INTERVAL = 0.05
+
+# Event kinds passed from _run_statements to execute_script
+_RESULT = "result"
+_STREAM = "stream"
+_FAILED = "failed"
+_DONE = "done"
+
+# Top-level statements whose source starts at their first decorator
+_DECORATABLE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# Non-image MIME types passed through, most preferred first
+_TEXT_MIME_PRIORITY = ('text/html', 'text/markdown', 'application/json', 'text/plain')
+
+# ANSI escape sequences (colors, cursor movement) in kernel tracebacks
+_ANSI_ESCAPE_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+
+def _statements_in_range(statements: list[dict], from_line: int, to_line: int) -> list[dict]:
+    """Return the statements overlapping lines from_line..to_line.
+
+    Statements are in source order and do not overlap, so both their start
+    and end lines are sorted and the matches form one contiguous slice.
+    """
+    # First statement ending at or after from_line
+    lo, hi = 0, len(statements)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if statements[mid]["lineEnd"] < from_line:
+            lo = mid + 1
+        else:
+            hi = mid
+    start = lo
+
+    # First statement starting after to_line
+    hi = len(statements)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if statements[mid]["lineStart"] <= to_line:
+            lo = mid + 1
+        else:
+            hi = mid
+
+    return statements[start:lo]
+
 
 class IPythonExecutor:
     """Python executor using IPython kernel."""
@@ -29,6 +85,8 @@ class IPythonExecutor:
         self.kc = None  # AsyncKernelClient
         self._startup_task: Optional[asyncio.Task] = None
         self._runtime_hooks_registered = False
+        # Parsed statements keyed by script digest, least recently used first
+        self._parse_cache: OrderedDict[bytes, tuple[dict, ...]] = OrderedDict()
 
     def start(self) -> None:
         """Start IPython kernel in the background.
@@ -73,18 +131,22 @@ class IPythonExecutor:
         # We need to handle messages that may not match our msg_id (from kernel startup)
         timeout_total = 30  # Total timeout in seconds
         loop = asyncio.get_running_loop()
-        start_time = loop.time()
-        while loop.time() - start_time < timeout_total:
+        deadline = loop.time() + timeout_total
+        while True:
+            # Wait for the next message until the overall deadline, rather
+            # than polling in fixed slices
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
             try:
-                msg = await asyncio.wait_for(self.kc.get_iopub_msg(), timeout=1)
-                if msg['parent_header'].get('msg_id') == msg_id:
-                    if msg['msg_type'] == 'status' and msg['content']['execution_state'] == 'idle':
-                        return
-                    elif msg['msg_type'] == 'error':
-                        raise RuntimeError(f"Silent execution failed: {msg['content']['ename']}: {msg['content']['evalue']}")
-            except asyncio.TimeoutError:
-                # Queue empty, keep waiting
-                continue
+                msg = await self.kc.get_iopub_msg(timeout=remaining)
+            except queue.Empty:
+                break
+            if msg['parent_header'].get('msg_id') == msg_id:
+                if msg['msg_type'] == 'status' and msg['content']['execution_state'] == 'idle':
+                    return
+                elif msg['msg_type'] == 'error':
+                    raise RuntimeError(f"Silent execution failed: {msg['content']['ename']}: {msg['content']['evalue']}")
         raise RuntimeError("Silent execution timed out")
 
     async def _register_display_formatters(self) -> None:
@@ -92,14 +154,18 @@ class IPythonExecutor:
         formatter_code = """
 def _register_pdit_formatter():
     import IPython
-    import itables
 
-    # Generate offline bundle
-    OFFLINE_INIT = itables.javascript.generate_init_offline_itables_html(itables.options.dt_bundle)
+    # Offline bundle, generated on the first DataFrame rather than at every
+    # kernel start: importing itables and building ~1 MB of JS is not free
+    offline_init = []
 
     def format_datatable(df, include=None, exclude=None):
+        import itables
+
+        if not offline_init:
+            offline_init.append(itables.javascript.generate_init_offline_itables_html(itables.options.dt_bundle))
         html = itables.to_html_datatable(df, display_logo_when_loading=False, connected=False, layout={"topStart": None, "topEnd": None, "bottomStart": "search", "bottomEnd": "paging"})
-        return f'{OFFLINE_INIT}{html}'
+        return f'{offline_init[0]}{html}'
 
     ip = IPython.get_ipython()
     if ip:
@@ -160,40 +226,75 @@ del _register_pdit_runtime_hooks
         self._runtime_hooks_registered = True
 
     def _parse_script(self, script: str) -> list[dict]:
-        """Parse Python script into statement dicts using AST."""
+        """Parse Python script into statement dicts using AST.
+
+        Results are cached by script content, so re-running an unchanged
+        script skips parsing. The statement dicts are shared between calls
+        and must not be mutated.
+        """
+        key = hashlib.blake2b(script.encode("utf-8"), digest_size=16).digest()
+        cached = self._parse_cache.get(key)
+        if cached is not None:
+            self._parse_cache.move_to_end(key)
+            return list(cached)
+
+        statements = self._build_statements(script)
+        self._parse_cache[key] = tuple(statements)
+        if len(self._parse_cache) > PARSE_CACHE_SIZE:
+            self._parse_cache.popitem(last=False)
+        return statements
+
+    def _build_statements(self, script: str) -> list[dict]:
+        """Split a script into top-level statement dicts."""
         tree = ast.parse(script)
         statements = []
-        lines = script.split('\n')
+
+        # Offsets where each line starts, so sources are sliced straight from
+        # the script instead of splitting and re-joining lines
+        line_offsets = [0]
+        pos = script.find('\n')
+        while pos != -1:
+            line_offsets.append(pos + 1)
+            pos = script.find('\n', pos + 1)
+        num_lines = len(line_offsets)
 
         for node in tree.body:
             line_start = node.lineno
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                if node.decorator_list:
-                    line_start = min(dec.lineno for dec in node.decorator_list)
+            if isinstance(node, _DECORATABLE_NODES) and node.decorator_list:
+                # Decorators are listed in source order
+                line_start = node.decorator_list[0].lineno
             line_end = node.end_lineno or node.lineno
 
-            # Extract source
-            source_lines = lines[line_start - 1:line_end]
-            source = '\n'.join(source_lines)
+            # Extract source (excluding the newline ending the last line)
+            end = line_offsets[line_end] - 1 if line_end < num_lines else len(script)
+            source = script[line_offsets[line_start - 1]:end]
 
-            is_expr = isinstance(node, ast.Expr)
-            is_string_literal = is_expr and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
-            is_fstring = is_expr and isinstance(node.value, ast.JoinedStr)
+            is_string_literal = is_fstring = False
+            markdown = None
+            if isinstance(node, ast.Expr):
+                value = node.value
+                if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                    is_string_literal = True
+                    # The literal's value, so running the cell needs no re-parse
+                    markdown = value.value.strip()
+                is_fstring = isinstance(value, ast.JoinedStr)
 
             statements.append({
                 "lineStart": line_start,
                 "lineEnd": line_end,
                 "source": source,
                 "isMarkdownCell": is_string_literal,
-                "isFStringMarkdown": is_fstring
+                "isFStringMarkdown": is_fstring,
+                "markdown": markdown,
             })
 
         return statements
 
     def _strip_ansi(self, text: str) -> str:
         """Strip ANSI escape codes from text."""
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        return ansi_escape.sub('', text)
+        if '\x1b' not in text:
+            return text
+        return _ANSI_ESCAPE_RE.sub('', text)
 
     def _process_mime_data(self, data: dict, metadata: dict | None = None) -> list[dict]:
         """Process MIME bundle data into output dicts.
@@ -209,28 +310,26 @@ del _register_pdit_runtime_hooks
         metadata = metadata or {}
 
         # Priority order for MIME types - pass through directly
-        # Check for any image type
-        image_types = [k for k in data.keys() if k.startswith('image/')]
-        if image_types:
-            # Use first image type found (they're usually in priority order)
-            mime_type = image_types[0]
-            item: dict[str, Any] = {"type": mime_type, "content": data[mime_type]}
+        # Use the first image type found (they're usually in priority order)
+        image_type = next((k for k in data if k.startswith('image/')), None)
+        if image_type is not None:
+            item: dict[str, Any] = {"type": image_type, "content": data[image_type]}
             # Include width/height from metadata if present
-            mime_metadata = metadata.get(mime_type, {})
+            mime_metadata = metadata.get(image_type, {})
             if 'width' in mime_metadata:
                 item['width'] = mime_metadata['width']
             if 'height' in mime_metadata:
                 item['height'] = mime_metadata['height']
             output.append(item)
-        elif 'text/html' in data:
-            output.append({"type": "text/html", "content": data['text/html']})
-        elif 'text/markdown' in data:
-            output.append({"type": "text/markdown", "content": data['text/markdown']})
-        elif 'application/json' in data:
-            json_data = data['application/json']
-            output.append({"type": "application/json", "content": json.dumps(json_data)})
-        elif 'text/plain' in data:
-            output.append({"type": "text/plain", "content": data['text/plain']})
+            return output
+
+        for mime_type in _TEXT_MIME_PRIORITY:
+            if mime_type in data:
+                content = data[mime_type]
+                if mime_type == 'application/json':
+                    content = json.dumps(content)
+                output.append({"type": mime_type, "content": content})
+                break
 
         return output
 
@@ -243,18 +342,52 @@ del _register_pdit_runtime_hooks
 
         Args:
             code: Python source to execute in the kernel.
-            on_stream: Optional callback invoked when stdout/stderr updates arrive.
+            on_stream: Optional callback invoked when stdout/stderr updates arrive,
+                at most once per STREAM_UPDATE_INTERVAL.
         """
         if self.kc is None:
             return [{"type": "error", "content": "Kernel not started"}]
 
         output: list[dict] = []
+        # Text pieces of the stream item at output[stream_index], joined only
+        # when needed instead of re-concatenating on every message
+        stream_index = -1
+        stream_parts: list[str] = []
+
+        def merge_stream() -> None:
+            if len(stream_parts) > 1:
+                merged = "".join(stream_parts)
+                stream_parts[:] = [merged]
+                # Replace rather than mutate: callers may hold earlier snapshots
+                output[stream_index] = {"type": output[stream_index]["type"], "content": merged}
+
+        # Stream updates are sent at most once per STREAM_UPDATE_INTERVAL;
+        # updates arriving in between are coalesced into the next one
+        loop = asyncio.get_running_loop()
+        next_update = 0.0
+        update_pending = False
+
+        async def send_update() -> None:
+            nonlocal next_update, update_pending
+            merge_stream()
+            update_pending = False
+            next_update = loop.time() + STREAM_UPDATE_INTERVAL
+            if on_stream is not None:
+                await on_stream(output)
 
         msg_id = self.kc.execute(code)
 
         # Collect output messages (no timeout - code can run indefinitely)
         while True:
-            msg = await self.kc.get_iopub_msg()
+            if update_pending:
+                # Wake up in time to deliver the held-back update
+                try:
+                    msg = await self.kc.get_iopub_msg(timeout=max(next_update - loop.time(), 0))
+                except queue.Empty:
+                    await send_update()
+                    continue
+            else:
+                msg = await self.kc.get_iopub_msg()
 
             # Only process messages for our execution
             if msg['parent_header'].get('msg_id') != msg_id:
@@ -264,18 +397,25 @@ del _register_pdit_runtime_hooks
             content = msg['content']
 
             if msg_type == 'status' and content['execution_state'] == 'idle':
-                # Execution complete
+                # Execution complete; a held-back update is dropped since the
+                # caller gets the full output as the statement's result
                 break
             elif msg_type == 'stream':
                 # stdout/stderr - merge consecutive outputs of same type
                 stream_name = content['name']  # 'stdout' or 'stderr'
                 text = content['text']
-                if output and output[-1]["type"] == stream_name:
-                    output[-1] = {"type": stream_name, "content": output[-1]["content"] + text}
+                if stream_parts and stream_index == len(output) - 1 and output[-1]["type"] == stream_name:
+                    stream_parts.append(text)
                 else:
+                    merge_stream()
+                    stream_parts[:] = [text]
+                    stream_index = len(output)
                     output.append({"type": stream_name, "content": text})
                 if on_stream:
-                    await on_stream(output)
+                    if loop.time() >= next_update:
+                        await send_update()
+                    else:
+                        update_pending = True
             elif msg_type == 'execute_result':
                 # Expression result
                 data = content['data']
@@ -292,6 +432,7 @@ del _register_pdit_runtime_hooks
                 tb = self._strip_ansi(tb)
                 output.append({"type": "error", "content": tb})
 
+        merge_stream()
         return output
 
     def _has_error(self, output: list[dict]) -> bool:
@@ -322,8 +463,8 @@ del _register_pdit_runtime_hooks
             statements = self._parse_script(script)
         except SyntaxError as e:
             error_line = e.lineno or 1
-            error_buffer = io.StringIO()
-            traceback.print_exc(file=error_buffer)
+            # Only the error itself is useful: the stack frames are pdit's own parser
+            error_content = "".join(traceback.format_exception_only(type(e), e))
             # Yield expressions first (just the error location)
             yield {
                 "type": "expressions",
@@ -333,18 +474,14 @@ del _register_pdit_runtime_hooks
             yield {
                 "lineStart": error_line,
                 "lineEnd": error_line,
-                "output": [{"type": "error", "content": error_buffer.getvalue()}],
+                "output": [{"type": "error", "content": error_content}],
                 "isInvisible": False
             }
             return
 
         # Filter by line range
         if line_range:
-            from_line, to_line = line_range
-            statements = [
-                stmt for stmt in statements
-                if not (stmt["lineEnd"] < from_line or stmt["lineStart"] > to_line)
-            ]
+            statements = _statements_in_range(statements, *line_range)
 
         # Yield expression info
         yield {
@@ -355,39 +492,80 @@ del _register_pdit_runtime_hooks
             ]
         }
 
-        # Execute each statement
-        for stmt in statements:
-            stream_cb = None
-            if on_stream is not None:
-                line_start = stmt["lineStart"]
-                line_end = stmt["lineEnd"]
+        # Execute in a background task so the kernel can start on the next
+        # statement while the caller is still handling the previous result.
+        # Stream updates go through the same queue to keep events in order.
+        events: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_DEPTH)
+        producer = asyncio.create_task(
+            self._run_statements(statements, events, stream=on_stream is not None)
+        )
+        try:
+            while True:
+                kind, payload = await events.get()
+                if kind == _RESULT:
+                    yield payload
+                elif kind == _STREAM:
+                    if on_stream is not None:
+                        await on_stream(*payload)
+                elif kind == _FAILED:
+                    raise payload
+                else:
+                    break
+        finally:
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
 
-                async def stream_cb(updated_output: list[dict]) -> None:
-                    await on_stream(line_start, line_end, updated_output)
+    async def _run_statements(
+        self, statements: list[dict], events: asyncio.Queue, stream: bool
+    ) -> None:
+        """Execute statements in order, feeding the events queue for execute_script.
 
-            if stmt["isMarkdownCell"]:
-                # For markdown cells, just return the string content
-                try:
-                    value = ast.literal_eval(stmt["source"])
-                    output = [{"type": "text/markdown", "content": str(value).strip()}]
-                except (ValueError, SyntaxError):
-                    output = await self._execute_code(stmt["source"], on_stream=stream_cb)
-            elif stmt["isFStringMarkdown"]:
-                # Wrap f-string in Markdown() so it returns text/markdown directly
-                wrapper_code = f"__import__('IPython').display.Markdown({stmt['source']})"
-                output = await self._execute_code(wrapper_code, on_stream=stream_cb)
-            else:
-                output = await self._execute_code(stmt["source"], on_stream=stream_cb)
+        Stops after the first statement that produces an error. Ends with a
+        _DONE event, or a _FAILED event carrying the exception that stopped it.
+        """
+        async def put_stream(line_start: int, line_end: int, updated_output: list[dict]) -> None:
+            # Snapshot: _execute_code keeps appending to the list
+            await events.put((_STREAM, (line_start, line_end, list(updated_output))))
 
-            yield {
-                "lineStart": stmt["lineStart"],
-                "lineEnd": stmt["lineEnd"],
-                "output": output,
-                "isInvisible": len(output) == 0
-            }
+        try:
+            for stmt in statements:
+                stream_cb: Callable[[list[dict]], Awaitable[None]] | None = None
+                if stream:
+                    stream_cb = functools.partial(put_stream, stmt["lineStart"], stmt["lineEnd"])
+
+                output = await self._execute_statement(stmt, stream_cb)
+                await events.put((_RESULT, {
+                    "lineStart": stmt["lineStart"],
+                    "lineEnd": stmt["lineEnd"],
+                    "output": output,
+                    "isInvisible": len(output) == 0
+                }))
+
+                if self._has_error(output):
+                    break
+        except Exception as e:
+            await events.put((_FAILED, e))
+            return
+        await events.put((_DONE, None))
 
-            if self._has_error(output):
-                break
+    async def _execute_statement(
+        self,
+        stmt: dict,
+        stream_cb: Callable[[list[dict]], Awaitable[None]] | None,
+    ) -> list[dict]:
+        """Execute a single parsed statement and return its output."""
+        if stmt["isMarkdownCell"]:
+            # For markdown cells, just return the string content
+            return [{"type": "text/markdown", "content": stmt["markdown"]}]
+        if stmt["isFStringMarkdown"]:
+            # Wrap f-string in Markdown() so it returns text/markdown directly
+            wrapper_code = f"__import__('IPython').display.Markdown({stmt['source']})"
+            return await self._execute_code(wrapper_code, on_stream=stream_cb)
+        return await self._execute_code(stmt["source"], on_stream=stream_cb)
 
     async def reset(self) -> None:
         """Reset the kernel (restart it)."""
@@ -0,0 +1,175 @@
+"""Tests for CLI helpers."""
+
+import errno
+import os
+import socket
+
+import pytest
+
+from pdit.cli import DEFAULT_PORT, bind_port, resolve_auth_token
+
+
+def _occupy_port(port: int) -> socket.socket:
+    """Bind and listen on a port so it is unavailable."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("127.0.0.1", port))
+    s.listen()
+    return s
+
+
+def _ipv6_available() -> bool:
+    """Check whether an IPv6 loopback socket can be bound."""
+    if not socket.has_ipv6:
+        return False
+    try:
+        with socket.socket(socket.AF_INET6, socket.SOCK_STREAM) as s:
+            s.bind(("::1", 0))
+    except OSError:
+        return False
+    return True
+
+
+def _bound_port(s: socket.socket) -> int:
+    """Return the port a socket is bound to, closing the socket."""
+    try:
+        return s.getsockname()[1]
+    finally:
+        s.close()
+
+
+class TestBindPort:
+    """Tests for bind_port."""
+
+    def test_returns_start_port_when_free(self):
+        """Test that a free start port is returned as-is."""
+        probe = _occupy_port(0)
+        port = probe.getsockname()[1]
+        probe.close()
+
+        assert _bound_port(bind_port(start_port=port)) == port
+
+    def test_taken_start_port_falls_back_to_os_assigned_port(self):
+        """Test that a taken start port yields a different, OS-assigned port."""
+        taken = _occupy_port(0)
+        try:
+            port = taken.getsockname()[1]
+            found = _bound_port(bind_port(start_port=port))
+            assert found != port
+            assert found > 0
+        finally:
+            taken.close()
+
+    def test_strict_raises_when_port_taken(self):
+        """Test that strict mode never falls back to another port."""
+        taken = _occupy_port(0)
+        try:
+            port = taken.getsockname()[1]
+            with pytest.raises(RuntimeError, match=f"Port {port} is already in use"):
+                bind_port(start_port=port, strict=True)
+        finally:
+            taken.close()
+
+    def test_unexpected_bind_error_is_raised(self):
+        """Test that errors other than an unavailable port are not swallowed."""
+        # 192.0.2.0/24 is reserved for documentation and never local
+        with pytest.raises(OSError):
+            bind_port("192.0.2.1", 9000)
+
+    @pytest.mark.skipif(not _ipv6_available(), reason="IPv6 not available")
+    def test_binds_ipv6_host(self):
+        """Test that an IPv6 host gets an IPv6 socket."""
+        s = bind_port("::1", 0)
+        try:
+            assert s.family == socket.AF_INET6
+            assert s.getsockname()[0] == "::1"
+        finally:
+            s.close()
+
+    def test_default_port_falls_back_to_os_assigned_port(self):
+        """Test that a taken default port yields an OS-assigned port."""
+        try:
+            taken = _occupy_port(DEFAULT_PORT)
+        except OSError:
+            taken = None  # Already in use by something else
+        try:
+            found = _bound_port(bind_port())
+            assert found != DEFAULT_PORT
+            assert found > 0
+        finally:
+            if taken is not None:
+                taken.close()
+
+
+class TestResolveAuthToken:
+    """Tests for resolve_auth_token."""
+
+    @pytest.fixture(autouse=True)
+    def isolated_token_env(self, monkeypatch, tmp_path):
+        """Keep the token env var and cache file out of the real environment."""
+        # setenv first so monkeypatch restores PDIT_TOKEN even when it was
+        # unset: resolve_auth_token writes os.environ directly
+        monkeypatch.setenv("PDIT_TOKEN", "")
+        monkeypatch.delenv("PDIT_TOKEN")
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+    def test_generates_and_caches_token(self):
+        """Test that a generated token is stored and reused."""
+        token = resolve_auth_token(no_token_auth=False)
+
+        assert token
+        assert os.environ["PDIT_TOKEN"] == token
+        assert resolve_auth_token(no_token_auth=False) == token
+
+    def test_env_token_takes_precedence(self, monkeypatch):
+        """Test that an explicit PDIT_TOKEN is used as-is."""
+        monkeypatch.setenv("PDIT_TOKEN", "explicit")
+
+        assert resolve_auth_token(no_token_auth=False) == "explicit"
+
+    def test_reuses_persisted_token_across_runs(self, monkeypatch):
+        """Test that a new process picks up the token from the cache file."""
+        token = resolve_auth_token(no_token_auth=False)
+        monkeypatch.delenv("PDIT_TOKEN")
+
+        assert resolve_auth_token(no_token_auth=False) == token
+
+    def test_rotate_generates_new_token(self, monkeypatch):
+        """Test that rotate ignores the persisted token and replaces it."""
+        token = resolve_auth_token(no_token_auth=False)
+        monkeypatch.delenv("PDIT_TOKEN")
+
+        rotated = resolve_auth_token(no_token_auth=False, rotate=True)
+        monkeypatch.delenv("PDIT_TOKEN")
+
+        assert rotated != token
+        assert resolve_auth_token(no_token_auth=False) == rotated
+
+    @pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions only")
+    def test_ignores_cache_file_readable_by_others(self, tmp_path):
+        """Test that a cache file with loose permissions is not trusted."""
+        cache_file = tmp_path / f"pdit-token-{os.getuid()}"
+        cache_file.write_text("planted")
+        cache_file.chmod(0o644)
+
+        token = resolve_auth_token(no_token_auth=False)
+
+        assert token != "planted"
+        assert cache_file.stat().st_mode & 0o777 == 0o600
+
+    def test_failed_cache_write_is_ignored(self, monkeypatch, tmp_path):
+        """Test that a failed token write neither crashes nor leaves a partial file."""
+        def failing_fdopen(fd, *args, **kwargs):
+            os.close(fd)
+            raise OSError(errno.ENOSPC, "No space left on device")
+
+        monkeypatch.setattr(os, "fdopen", failing_fdopen)
+
+        assert resolve_auth_token(no_token_auth=False)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_no_token_auth_clears_token(self, monkeypatch):
+        """Test that disabling token auth removes any existing token."""
+        monkeypatch.setenv("PDIT_TOKEN", "existing")
+
+        assert resolve_auth_token(no_token_auth=True) is None
+        assert "PDIT_TOKEN" not in os.environ
@@ -0,0 +1,81 @@
+"""Tests for HTML export."""
+
+import json
+
+from pdit import exporter
+from pdit.exporter import execute_script, generate_html, render_html
+
+
+class TestExecuteScript:
+    """Tests for exporter.execute_script."""
+
+    def test_collects_expressions_in_frontend_format(self):
+        """Test that results are numbered and wrapped for the frontend."""
+        expressions = execute_script("x = 1\nx + 1\nprint('hi')", "script.py")
+
+        assert [e["id"] for e in expressions] == [0, 1, 2]
+        assert [(e["lineStart"], e["lineEnd"]) for e in expressions] == [(1, 1), (2, 2), (3, 3)]
+        assert all(e["state"] == "done" for e in expressions)
+        assert expressions[0]["result"] == {"output": [], "isInvisible": True}
+        assert expressions[1]["result"]["output"] == [{"type": "text/plain", "content": "2"}]
+        assert expressions[2]["result"]["output"] == [{"type": "stdout", "content": "hi\n"}]
+
+    def test_stops_after_error(self):
+        """Test that statements after an error are not exported."""
+        expressions = execute_script("1 / 0\n2", "script.py")
+
+        assert len(expressions) == 1
+        assert expressions[0]["result"]["output"][0]["type"] == "error"
+
+
+class TestGenerateHtml:
+    """Tests for exporter.generate_html."""
+
+    def test_injects_escaped_payload_before_head_end(self, monkeypatch):
+        """Test that the payload lands in <head> and cannot close the script tag."""
+        monkeypatch.setattr(exporter, "_template_parts", lambda: (b"<head>", b"</head><body></body>"))
+        code = "print('</script>')"
+
+        html = generate_html(code, [])
+
+        prefix = "<head><script>window.__pdit_response__ = "
+        assert html.startswith(prefix)
+        assert html.endswith(";</script>\n</head><body></body>")
+        payload = html[len(prefix):html.index(";</script>")]
+        assert "<" not in payload
+        assert json.loads(payload) == {"code": code, "expressions": []}
+
+    def test_render_html_returns_utf8_bytes(self, monkeypatch):
+        """Test that the byte export is UTF-8 and matches generate_html."""
+        monkeypatch.setattr(exporter, "_template_parts", lambda: (b"<head>", b"</head>"))
+        code = "print('héllo ☃')"
+
+        html_bytes = render_html(code, [])
+
+        assert isinstance(html_bytes, bytes)
+        assert html_bytes.decode("utf-8") == generate_html(code, [])
+        payload = html_bytes[html_bytes.index(b"= ") + 2:html_bytes.index(b";</script>")]
+        assert json.loads(payload)["code"] == code
+
+
+class TestDumps:
+    """Tests for exporter._dumps."""
+
+    def test_falls_back_to_json_without_orjson(self, monkeypatch):
+        """Test that the stdlib serializer is used when orjson is missing."""
+        monkeypatch.setattr(exporter, "orjson", None)
+        obj = {"code": "print('héllo')", "expressions": [{"id": 0}]}
+
+        data = exporter._dumps(obj)
+
+        assert isinstance(data, bytes)
+        assert data == json.dumps(obj).encode("ascii")
+
+    def test_serializes_integers_wider_than_64_bits(self):
+        """Test that big integers round-trip even when orjson rejects them."""
+        obj = {"value": 2**70, "negative": -(2**70)}
+
+        data = exporter._dumps(obj)
+
+        assert isinstance(data, bytes)
+        assert json.loads(data) == obj
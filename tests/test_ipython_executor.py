@@ -1,7 +1,9 @@
 """Tests for IPythonExecutor."""
 
+import asyncio
+
 import pytest
-from pdit.ipython_executor import IPythonExecutor
+from pdit.ipython_executor import PIPELINE_DEPTH, IPythonExecutor
 
 
 async def collect_results(async_gen):
@@ -110,6 +112,32 @@ c.count"""
         assert len(statements) == 1
         assert statements[0]["isMarkdownCell"] is True
 
+    def test_parse_markdown_value(self, executor):
+        """Test that a markdown cell's text is taken from the parsed literal."""
+        script = '"""\n# Title\n"""\nx = 1'
+        statements = executor._parse_script(script)
+
+        assert statements[0]["markdown"] == "# Title"
+        assert statements[1]["markdown"] is None
+
+    def test_parse_cache_reuses_statements(self, executor):
+        """Test that re-parsing an unchanged script hits the cache."""
+        script = "a = 1\nb = 2"
+        first = executor._parse_script(script)
+        second = executor._parse_script(script)
+
+        assert second == first
+        assert second[0] is first[0]
+
+    def test_parse_cache_is_bounded(self, executor):
+        """Test that the parse cache evicts old scripts."""
+        from pdit.ipython_executor import PARSE_CACHE_SIZE
+
+        for i in range(PARSE_CACHE_SIZE + 5):
+            executor._parse_script(f"x = {i}")
+
+        assert len(executor._parse_cache) == PARSE_CACHE_SIZE
+
 
 class TestCodeExecution:
     """Tests for code execution."""
@@ -243,6 +271,8 @@ class TestErrorHandling:
         assert len(result["output"]) == 1
         assert result["output"][0]["type"] == "error"
         assert "SyntaxError" in result["output"][0]["content"]
+        # pdit's own parser frames are not part of the message
+        assert "Traceback" not in result["output"][0]["content"]
 
     async def test_type_error(self, executor):
         """Test capturing type errors."""
@@ -423,6 +453,27 @@ class TestMimeTypeProcessing:
         assert "'a'" in content or '"a"' in content
         assert "1" in content
 
+    def test_mime_priority(self, executor):
+        """Test that the richest MIME type in a bundle wins."""
+        data = {"text/plain": "p", "application/json": {"a": 1}, "text/html": "<b>h</b>"}
+
+        assert executor._process_mime_data(data) == [{"type": "text/html", "content": "<b>h</b>"}]
+        del data["text/html"]
+        assert executor._process_mime_data(data) == [{"type": "application/json", "content": '{"a": 1}'}]
+
+    def test_image_takes_precedence_with_size(self, executor):
+        """Test that images win over text and carry their size metadata."""
+        data = {"text/plain": "<Figure>", "image/png": "iVBOR"}
+        metadata = {"image/png": {"width": 640, "height": 480}}
+
+        assert executor._process_mime_data(data, metadata) == [
+            {"type": "image/png", "content": "iVBOR", "width": 640, "height": 480}
+        ]
+
+    def test_unknown_mime_types_ignored(self, executor):
+        """Test that bundles without a supported type produce no output."""
+        assert executor._process_mime_data({"application/x-custom": "?"}) == []
+
 
 class TestKernelReset:
     """Tests for kernel reset functionality."""
@@ -586,6 +637,95 @@ add(10, 20)"""
         assert "30" in results[-1]["output"][0]["content"]
 
 
+class TestStreamUpdates:
+    """Tests for on_stream updates during execution."""
+
+    async def test_updates_are_coalesced(self, executor):
+        """Test that rapid prints produce fewer updates than messages."""
+        updates = []
+
+        async def on_stream(line_start, line_end, output):
+            updates.append(output)
+
+        script = "for i in range(200):\n    print(i, flush=True)"
+        results = await collect_results(executor.execute_script(script, on_stream=on_stream))
+
+        expected = "".join(f"{i}\n" for i in range(200))
+        assert results[-1]["output"] == [{"type": "stdout", "content": expected}]
+        assert 0 < len(updates) < 200
+        assert all(update[0]["content"] for update in updates)
+
+    async def test_held_back_update_is_delivered_while_running(self, executor):
+        """Test that a coalesced update is sent even if no further output arrives."""
+        updates = []
+
+        async def on_stream(line_start, line_end, output):
+            updates.append(output[0]["content"])
+
+        script = "import time\nif True:\n    print('a', flush=True)\n    print('b', flush=True)\n    time.sleep(0.5)"
+        await collect_results(executor.execute_script(script, on_stream=on_stream))
+
+        assert updates[-1] == "a\nb\n"
+
+
+class TestPipelinedExecution:
+    """Tests for the background task that runs statements for execute_script."""
+
+    async def test_closing_generator_cancels_execution(self, clean_executor, monkeypatch):
+        """Test that closing execute_script early cancels the statement runner."""
+        runner_tasks = []
+        run_statements = clean_executor._run_statements
+
+        async def spy(*args, **kwargs):
+            runner_tasks.append(asyncio.current_task())
+            await run_statements(*args, **kwargs)
+
+        monkeypatch.setattr(clean_executor, "_run_statements", spy)
+        script = "ran = []\n" + "ran.append(1)\n" * 20
+
+        gen = clean_executor.execute_script(script)
+        await gen.__anext__()  # expressions event
+        await gen.__anext__()  # first result
+        await gen.aclose()
+
+        assert runner_tasks[0].cancelled()
+        monkeypatch.undo()
+        results = await collect_results(clean_executor.execute_script("len(ran)"))
+        # Only the statements the pipeline ran ahead may have run: a full
+        # queue, one result waiting to be queued and one still in the kernel
+        assert int(results[1]["output"][0]["content"]) <= PIPELINE_DEPTH + 2
+
+    async def test_executor_exception_is_raised(self, executor, monkeypatch):
+        """Test that an exception while running a statement reaches the caller."""
+        async def fail(code, on_stream=None):
+            raise RuntimeError("kernel went away")
+
+        monkeypatch.setattr(executor, "_execute_code", fail)
+
+        with pytest.raises(RuntimeError, match="kernel went away"):
+            await collect_results(executor.execute_script("x = 1"))
+
+    async def test_stream_updates_precede_their_result(self, executor):
+        """Test that a statement's stream updates arrive before its result."""
+        events = []
+
+        async def on_stream(line_start, line_end, output):
+            events.append(("stream", line_start))
+
+        script = "print('a')\nprint('b')\nprint('c')"
+        async for event in executor.execute_script(script, on_stream=on_stream):
+            if "output" in event:
+                events.append(("result", event["lineStart"]))
+
+        results = [e for e in events if e[0] == "result"]
+        assert results == [("result", 1), ("result", 2), ("result", 3)]
+        for line in (1, 2, 3):
+            result_index = events.index(("result", line))
+            assert ("stream", line) in events[:result_index]
+            assert all(e[1] == line for e in events[:result_index] if e[1] >= line)
+            assert all(e[1] > line for e in events[result_index + 1:])
+
+
 class TestStripAnsi:
     """Tests for ANSI escape code stripping."""
 
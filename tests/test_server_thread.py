@@ -0,0 +1,69 @@
+"""Tests for the threaded uvicorn server."""
+
+import threading
+import urllib.request
+
+import pytest
+import uvicorn
+
+from pdit import server as pdit_server
+from pdit._server_thread import Server
+from pdit.cli import bind_port
+
+
+async def _hello_app(scope, receive, send):
+    """Minimal ASGI app answering every HTTP request with 200."""
+    if scope["type"] != "http":
+        return
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"hello"})
+
+
+@pytest.fixture(autouse=True)
+def no_session_shutdown(monkeypatch):
+    """Keep run_in_thread from setting pdit.server's global shutdown event."""
+    calls = []
+    monkeypatch.setattr(pdit_server, "signal_shutdown", lambda: calls.append(True))
+    return calls
+
+
+class TestRunInThread:
+    """Tests for Server.run_in_thread."""
+
+    def test_serves_until_context_exits(self, no_session_shutdown):
+        """Test that the server answers requests inside the block and stops after."""
+        config = uvicorn.Config(_hello_app, log_level="warning")
+        server = Server(config=config, shutdown_event=threading.Event())
+
+        with bind_port("127.0.0.1", 0) as sock:
+            port = sock.getsockname()[1]
+            with server.run_in_thread(sockets=[sock]):
+                assert server.started
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/") as response:
+                    assert response.read() == b"hello"
+
+        assert server.should_exit
+        assert no_session_shutdown == [True]
+
+    @pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+    def test_failed_startup_raises(self):
+        """Test that a server thread dying during startup is reported."""
+        config = uvicorn.Config("pdit.does_not_exist:app", log_level="critical")
+        server = Server(config=config, shutdown_event=threading.Event())
+
+        with bind_port("127.0.0.1", 0) as sock:
+            with pytest.raises(RuntimeError, match="Server failed to start"):
+                with server.run_in_thread(sockets=[sock]):
+                    pass
+
+    @pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+    def test_shutdown_request_ends_startup_wait(self):
+        """Test that a pending shutdown skips the startup failure error."""
+        config = uvicorn.Config("pdit.does_not_exist:app", log_level="critical")
+        shutdown_event = threading.Event()
+        shutdown_event.set()
+        server = Server(config=config, shutdown_event=shutdown_event)
+
+        with bind_port("127.0.0.1", 0) as sock:
+            with server.run_in_thread(sockets=[sock]):
+                assert not server.started